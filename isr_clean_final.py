@@ -1,9 +1,15 @@
 import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 from arcgis.geocoding import geocode
 from arcgis.gis import GIS
 import os
+import re
+import sqlite3
 
 #==========================================================================================================#
 # After downloading Anaconda, you will need to create a virtual environment using the following commands:  #
@@ -13,13 +19,62 @@ import os
 # Setup basic configuration for logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def load_data(file_path, sample_size=None):
-    """Load data from CSV or Excel file based on file extension and optionally sample it."""
+# Characters stripped from monetary values before they are converted to numbers
+MONEY_RE = re.compile(r'[,$]')
+
+# Separators between affiliations in 'Constituent Affiliation', including any surrounding whitespace
+AFFILIATION_SEPARATOR_RE = re.compile(r'\s*[\n,]\s*')
+
+# Persistent geocode cache, kept next to this script regardless of the working directory
+GEOCODE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'geocode_cache.sqlite')
+
+# Columns from the MProfile export that are not used by the dashboard; they are skipped when the file is read
+DROPPED_COLUMNS = {
+    'Other Country.1', 'Other Major Gift Region.1', 'Other Primary Metro.1', 'Other Zip.1', 'Other State.1', 'Other City.1',
+    'Other Address.1', 'Other Address Incomplete?.1', 'Other Type.1', 'Other Country', 'Other Major Gift Region', 'Other Primary Metro',
+    'Other Zip', 'Other State', 'Other City', 'Other Address', 'Other Address Is Primary?', 'Other Address Incomplete?', 'Other Type',
+    'Home Address Incomplete?', 'Home Address Is Primary?', 'Work Country', 'Work Primary Metro Area', 'Work Major Gift Region',
+    'Work Phone', 'Work County', 'Work Zip', 'Work State', 'Work City', 'Work Address', 'Work Address Is Primary?',
+    'Work Address Incomplete?', 'Career Level', 'Full Name', 'Title', 'First Name', 'Last/Name/Org Name', 'Committee Name',
+    'Committee Role', 'Former Commitee Name', 'Former Committee Role', 'Spouse LookupID', 'Formal Mailing Name (Joint/Individual)',
+    'Informal Mailing Name (Joint/Individual)', 'Payments Received', 'Expectancies (Balance Due)', 'Commitments (Balance Due)',
+    '# of Recognition Transactions', 'Number of Years of Recognition', 'One-Time Gifts', 'Commitments', 'Expectancies', 'A.6', 'A.7',
+    'A.5', 'A.4', 'A.8', 'Payments Received.1', 'A.9', 'Commitments (Balance Due).1', 'A.10', 'Expectancies (Balance Due).1', 'A.11',
+    'Last Amount', 'Last Designation', '# of Recognition Transactions.1', 'Number of Years of Recognition.1', ' Campaign Recognition',
+    'A.12', 'One-Time Gifts.1', 'Commitments.1', 'A.13', 'A.14', 'Expectancies.1', 'A.15', 'Last Visit/Introduction by',
+    'Interaction Type', 'Job Category', 'Home Phone', 'Monteith Society', 'Primary Capacity Rating Type', 'Primary Capacity Rating Date',
+    'Primary Inclination Rating Type', 'Primary Inclination Rating Date', 'Gift Officer Field Rating', 'Gift Officer Field Rating Date',
+    'Research Rating', 'Research Rating Date', 'Capacity Verified Rating', 'Capacity Verified Rating Date', 'Capacity Unverified Rating',
+    'Capacity Unverified Rating Date', 'Blackbaud Hard Asset', 'Blackbaud Hard Asset Date', 'Wealth-X Net Worth',
+    'Wealth-X Net Worth Date', 'Windfall Data Net Worth', 'Windfall Data Net Worth Date', 'Target Analytics Net Worth',
+    'Target Analytics Net Worth Date', 'PDA UM Inclination', 'UM AG Propensity', 'Med Primary Manager'
+}
+
+def load_data(file_path, sample_size=None, usecols=None):
+    """Load data from CSV, Parquet or Excel file based on file extension and optionally sample it.
+
+    If given, usecols is a callable that receives each column name and returns True for the columns to load."""
     logging.info(f"Loading data from {file_path}")
     if file_path.endswith('.csv'):
-        df = pd.read_csv(file_path, low_memory=False)
+        raw_header = pd.read_csv(file_path, header=None, nrows=1, dtype=str, keep_default_na=False).iloc[0].tolist()
+        # Name empty header cells (e.g. an index written by to_csv) the way the C engine does
+        header = [name if name != '' else f'Unnamed: {position}' for position, name in enumerate(raw_header)]
+        if len(set(header)) < len(header):
+            # Only the C engine renames duplicate headers to 'X.1', 'X.2', ... which the rest of the script relies on
+            logging.info(f"{file_path} has duplicate column names; reading it with the C engine")
+            df = pd.read_csv(file_path, usecols=usecols, low_memory=False)
+        else:
+            # The pyarrow engine only accepts a list of the raw header names, so resolve the filter against the header
+            selected = [(raw, name) for raw, name in zip(raw_header, header) if usecols is None or usecols(name)]
+            df = pd.read_csv(file_path, engine='pyarrow', usecols=[raw for raw, name in selected])
+            df.columns = [name for raw, name in selected]
+    elif file_path.endswith('.parquet'):
+        columns = None
+        if usecols is not None:
+            columns = [column for column in pq.read_schema(file_path).names if usecols(column)]
+        df = pd.read_parquet(file_path, engine='pyarrow', columns=columns)
     elif file_path.endswith('.xlsx'):
-        df = pd.read_excel(file_path)
+        df = read_excel_cached(file_path, usecols)
     else:
         raise ValueError("Unsupported file format.")
     
@@ -27,6 +82,67 @@ def load_data(file_path, sample_size=None):
         df = df.sample(n=sample_size, random_state=1)
     return df
 
+def mixed_columns_to_text(df):
+    """
+    Store object and categorical columns that do not hold only strings as text, so they can be written to Parquet.
+
+    Parquet needs a single type per column, while Excel columns often mix numbers and text (e.g. zip codes with
+    ZIP+4 entries) and the 'Interests' column holds dictionaries. Missing values are kept as missing.
+
+    Args:
+        df (pandas.DataFrame): The DataFrame to convert.
+
+    Returns:
+        pandas.DataFrame: The DataFrame with those columns converted to text.
+    """
+    df = df.copy()
+    for column in df.columns:
+        dtype = str(df[column].dtype)
+        if dtype == 'object':
+            values = df[column].dropna()
+            if not all(isinstance(value, str) for value in values):
+                df[column] = df[column].astype(str).where(df[column].notna(), None)
+        elif dtype == 'category' and not all(isinstance(value, str) for value in df[column].cat.categories):
+            df[column] = df[column].astype(str).astype('category').where(df[column].notna()).cat.remove_unused_categories()
+    return df
+
+def read_excel_cached(file_path, usecols=None):
+    """
+    Read an Excel file through a Parquet copy stored next to it.
+
+    The workbook is parsed once, columns mixing numbers and text are stored as text (see mixed_columns_to_text),
+    and the result is written to '<file_path>.parquet'. Later runs read the Parquet copy instead,
+    as long as it is newer than the workbook. The copy holds every column so changing usecols does not invalidate it.
+
+    Args:
+        file_path (str): Path to the Excel file.
+        usecols (callable, optional): Returns True for the column names to load. Defaults to loading all columns.
+
+    Returns:
+        pandas.DataFrame: The loaded data.
+    """
+    parquet_path = file_path + '.parquet'
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(file_path):
+        logging.info(f"Reading cached Parquet copy {parquet_path}")
+    else:
+        df = mixed_columns_to_text(pd.read_excel(file_path))
+        try:
+            df.to_parquet(parquet_path, engine='pyarrow', index=False)
+        except (TypeError, ValueError) as e:
+            logging.warning(f"Could not cache {file_path} as Parquet: {e}")
+            # Do not leave a partial copy behind that a later run would treat as up to date
+            if os.path.exists(parquet_path):
+                os.remove(parquet_path)
+            if usecols is not None:
+                df = df[[column for column in df.columns if usecols(column)]]
+            return df
+
+    # Read the Parquet copy on the first run too, so missing values come back the same way (None) on every run
+    columns = None
+    if usecols is not None:
+        columns = [column for column in pq.read_schema(parquet_path).names if usecols(column)]
+    return pd.read_parquet(parquet_path, engine='pyarrow', columns=columns)
+
 def clean_and_prepare_data(df):
     """
     Prepare data by cleaning and transforming the DataFrame.
@@ -43,25 +159,6 @@ def clean_and_prepare_data(df):
     """
     logging.info("Starting cleaning and preparing data.")
 
-    # Drop unnecessary columns
-    df = df.drop(columns=['Other Country.1', 'Other Major Gift Region.1', 'Other Primary Metro.1', 'Other Zip.1', 'Other State.1', 'Other City.1', 
-        'Other Address.1', 'Other Address Incomplete?.1', 'Other Type.1', 'Other Country', 'Other Major Gift Region', 'Other Primary Metro', 
-        'Other Zip', 'Other State', 'Other City', 'Other Address', 'Other Address Is Primary?', 'Other Address Incomplete?', 'Other Type', 
-        'Home Address Incomplete?', 'Home Address Is Primary?', 'Work Country', 'Work Primary Metro Area', 'Work Major Gift Region',
-        'Work Phone', 'Work County', 'Work Zip', 'Work State', 'Work City', 'Work Address', 'Work Address Is Primary?', 'Work Address Incomplete?',
-        'Career Level','Full Name', 'Title', 'First Name', 'Last/Name/Org Name', 'Committee Name', 'Committee Role', 'Former Commitee Name', 
-        'Former Committee Role', 'Spouse LookupID', 'Formal Mailing Name (Joint/Individual)', 'Informal Mailing Name (Joint/Individual)', 
-        'Payments Received', 'Expectancies (Balance Due)', 'Commitments (Balance Due)', '# of Recognition Transactions', 
-        'Number of Years of Recognition', 'One-Time Gifts', 'Commitments', 'Expectancies', 'A.6', 'A.7', 'A.5', 'A.4', 
-        'A.8', 'Payments Received.1', 'A.9', 'Commitments (Balance Due).1', 'A.10', 'Expectancies (Balance Due).1', 'A.11', 'Last Amount', 
-        'Last Designation', '# of Recognition Transactions.1', 'Number of Years of Recognition.1', ' Campaign Recognition', 'A.12', 
-        'One-Time Gifts.1', 'Commitments.1', 'A.13', 'A.14', 'Expectancies.1', 'A.15', 'Last Visit/Introduction by', 'Interaction Type', 
-        'Job Category', 'Home Phone', 'Monteith Society', 'Primary Capacity Rating Type', 'Primary Capacity Rating Date', 'Primary Inclination Rating Type',
-        'Primary Inclination Rating Date', 'Gift Officer Field Rating', 'Gift Officer Field Rating Date', 'Research Rating', 'Research Rating Date', 
-        'Capacity Verified Rating', 'Capacity Verified Rating Date', 'Capacity Unverified Rating', 'Capacity Unverified Rating Date', 'Blackbaud Hard Asset',
-        'Blackbaud Hard Asset Date', 'Wealth-X Net Worth', 'Wealth-X Net Worth Date', 'Windfall Data Net Worth', 'Windfall Data Net Worth Date', 
-        'Target Analytics Net Worth', 'Target Analytics Net Worth Date', 'PDA UM Inclination', 'UM AG Propensity', 'Med Primary Manager'])
-    
     # Rename 'Constituent LookupID' to 'LID'
     if 'Constituent LookupID' in df.columns:
         df.rename(columns={'Constituent LookupID': 'LID'}, inplace=True)
@@ -76,29 +173,64 @@ def clean_and_prepare_data(df):
     
     # Create Latitude and Longitude columns if they do not exist
     if 'Latitude' not in df.columns or 'Longitude' not in df.columns:
-        df['Latitude'] = None
-        df['Longitude'] = None
+        df['Latitude'] = np.full(len(df), np.nan, dtype='float32')
+        df['Longitude'] = np.full(len(df), np.nan, dtype='float32')
 
     # Rename 'latitude' and 'longitude' columns to 'Latitude' and 'Longitude' if present
     if 'latitude' in df.columns and 'longitude' in df.columns:
         df.rename(columns={'latitude': 'Latitude', 'longitude': 'Longitude'}, inplace=True)
     
     # Create a 'Primary Address' column from the home address components
-    df['Primary Address'] = df.apply(lambda x: f"{x['Home Address']}, {x['Home City']}, {x['Home State']} {x['Home Zip']}, {x['Home Country']}", axis=1)
+    # Missing components are left blank rather than written as 'nan'/'None', which depends on how the file was read
+    address_parts = {column: df[column].fillna('').astype(str)
+                     for column in ['Home Address', 'Home City', 'Home State', 'Home Zip', 'Home Country']}
+    df['Primary Address'] = (address_parts['Home Address'] + ', ' + address_parts['Home City'] + ', '
+                             + address_parts['Home State'] + ' ' + address_parts['Home Zip'] + ', '
+                             + address_parts['Home Country'])
+
+    # Create a 'donor_status' column: ISR recognition takes precedence over UM-Wide recognition
+    isr_mask = df['Institute for Social Research\nLifetime Recognition'].notna()
+    um_mask = df['UM-Wide\nLifetime Recognition'].notna()
+    df['donor_status'] = np.where(isr_mask, 'ISR Donor', np.where(um_mask, 'UM Donor', 'Non Donor'))
 
-    # Create a 'donor_status' column based on the 'UM-Wide Lifetime Recognition' column and 'ISR Donor' status
-    df['donor_status'] = df['Institute for Social Research\nLifetime Recognition'].map(lambda x: 'ISR Donor', na_action='ignore')
+    # Convert monetary columns to numeric values
+    df['Institute for Social Research Lifetime Recognition Numeric'] = pd.to_numeric(
+        df['Institute for Social Research\nLifetime Recognition'].astype(str).str.replace(MONEY_RE, '', regex=True),
+        errors='coerce').fillna(0)
+    df["UM-Wide Lifetime Recognition Numeric"] = pd.to_numeric(
+        df['UM-Wide\nLifetime Recognition'].astype(str).str.replace(MONEY_RE, '', regex=True),
+        errors='coerce').fillna(0)
 
-    # Fill missing values in 'donor_status' column based on 'UM-Wide Lifetime Recognition' column
-    df['donor_status'] = df.apply(UM_donor, axis=1)
-    df['donor_status'].fillna('Non Donor', inplace=True)
+    # Convert 'Age' column to numeric, fill missing values with 0 and store it in the smallest unsigned integer type
+    df['Age'] = pd.to_numeric(pd.to_numeric(df['Age'], errors='coerce').fillna(0).astype(int), downcast='unsigned')
 
-    # Convert monetary columns to numeric values
-    df['Institute for Social Research Lifetime Recognition Numeric'] = df['Institute for Social Research\nLifetime Recognition'].map(replace)
-    df["UM-Wide Lifetime Recognition Numeric"] = df['UM-Wide\nLifetime Recognition'].map(replace)
+    # Keep the monetary columns as float64 on every export: float32 cannot hold cents exactly and a data-dependent
+    # downcast would change the output schema from one run to the next
+    for column in ['Institute for Social Research Lifetime Recognition Numeric', 'UM-Wide Lifetime Recognition Numeric']:
+        df[column] = df[column].astype('float64')
 
-    # Convert 'Age' column to numeric and fill missing values with 0
-    df['Age'] = pd.to_numeric(df['Age'], errors='coerce').fillna(0).astype(int)
+    return df
+
+def categorize_columns(df, threshold=0.5):
+    """
+    Convert repetitive string columns to the pandas 'category' dtype to reduce memory use.
+
+    Args:
+        df (pd.DataFrame): The DataFrame whose columns should be converted.
+        threshold (float, optional): Maximum ratio of unique values to rows for a column to be converted. Defaults to 0.5.
+
+    Returns:
+        pd.DataFrame: The DataFrame with low-cardinality string columns stored as categoricals.
+    """
+    # donor_status only ever takes one of three values, so give it fixed levels
+    if 'donor_status' in df.columns:
+        df['donor_status'] = pd.Categorical(df['donor_status'], categories=['ISR Donor', 'UM Donor', 'Non Donor'])
+
+    for column in df.select_dtypes(include='object').columns:
+        n_unique = df[column].nunique()
+        # Skip all-null columns since there is nothing to encode
+        if 0 < n_unique < threshold * len(df):
+            df[column] = df[column].astype('category')
 
     return df
 
@@ -114,51 +246,28 @@ def fill_missing_values(df):
     fill_values = {
         'object': 'Not Available',  # Use 'Not Available' for string types
         'float64': 0.0,  # Use 0.0 for floats
+        'float32': 0.0,
         'int64': 0,    # Use 0 for integers
         'datetime64[ns]': pd.Timestamp('1900-01-01'),  # A common default date
         'bool': False,  # False for booleans
         'category': 'Not Available'  # Use 'Not Available' for categorical data
     }
 
-    # Iterate over each column in the DataFrame
-    for column in df.columns:
-        dtype = str(df[column].dtype)
-        if df[column].isnull().any():  # Check if there are any nulls to fill
-            fill_value = fill_values.get(dtype, 'Not Available')  # Get specific fill value or use 'Not Available'
-            if dtype == 'category' and 'Not Available' not in df[column].cat.categories:
-                df[column] = df[column].cat.add_categories('Not Available')
-            df[column].fillna(fill_value, inplace=True)
-            logging.info(f"Filled missing values in {column} with {fill_value}")
-        else:
-            logging.info(f"No missing values to fill in {column}")
-
-    return df
-
-def UM_donor(row):
-    """Determines the donor status based on lifetime recognition columns."""
-    if pd.isnull(row.donor_status) and not pd.isnull(row['UM-Wide\nLifetime Recognition']):
-        return 'UM Donor'
-    return row.donor_status
-
-
-def replace(num):
-    """
-    Replaces special characters in a given number and returns the cleaned number.
+    # Find the columns with missing values and look up every column's dtype once
+    null_columns = df.columns[df.isnull().any().values]
+    dtypes = df.dtypes.astype(str)
 
-    Parameters:
-    num (int, float, str): The number to be cleaned.
+    # Categorical columns only accept fill values that are already one of their categories
+    for column in null_columns:
+        if dtypes[column] == 'category' and 'Not Available' not in df[column].cat.categories:
+            df[column] = df[column].cat.add_categories('Not Available')
 
-    Returns:
-    float: The cleaned number.
+    # Fill the columns in a single pass, using the specific fill value for their dtype or 'Not Available'
+    fill_dict = {column: fill_values.get(dtypes[column], 'Not Available') for column in null_columns}
+    df.fillna(fill_dict, inplace=True)
+    logging.info(f"Filled missing values in {len(null_columns)} columns.")
 
-    """
-    if pd.isna(num):
-        return 0
-    if isinstance(num, str):
-        return float(num.replace(',', '').replace('$', ''))
-    elif isinstance(num, (int, float)):
-        return num
-    return 0
+    return df
 
 def create_affiliation_columns(df):
     """ Creates individual columns for each affiliation found in the DataFrame. """
@@ -167,46 +276,101 @@ def create_affiliation_columns(df):
         logging.error("Constituent Affiliation column missing.")
         return df, set()
     
-    def clean_affiliations(affiliation):
-        if pd.isna(affiliation):
-            return []
-        # Split by newline, replace commas and split, then flatten the list
-        return list(set(affiliation.replace('\n', ',').split(',')))
-
-    df['Affiliation List'] = df['Constituent Affiliation'].apply(clean_affiliations)
-    all_affiliations = set()
-    for affil_list in df['Affiliation List']:
-        all_affiliations.update(affil_list)
-    
-    for affil in all_affiliations:
-        df[f'Affiliation: {affil}'] = df['Affiliation List'].apply(lambda x: affil in x)
-    
+    # Normalize newline and comma separators (and surrounding whitespace) to a single comma
+    raw = df['Constituent Affiliation'].fillna('').str.replace(AFFILIATION_SEPARATOR_RE, ',', regex=True).str.strip()
+
+    # One row per (constituent, affiliation) token, one-hot encoded and folded back to one row per constituent.
+    # Series.str.get_dummies is not used because it tests every tag against every row in a Python loop.
+    tokens = raw.str.split(',').explode()
+    tokens = tokens[tokens.ne('')]
+    dummies = pd.get_dummies(tokens, dtype=bool).groupby(level=0).any().reindex(df.index, fill_value=False)
+    all_affiliations = set(dummies.columns)
+    dummies.columns = [f'Affiliation: {affil}' for affil in dummies.columns]
+    df = pd.concat([df, dummies], axis=1)
+
     return df, all_affiliations
 
-def save_affiliation_files(processed_data, affiliations, output_dir='affiliation_layers'):
+def write_table(df, path, file_format='parquet'):
+    """
+    Write a DataFrame to disk as Parquet or CSV.
+
+    For Parquet output, columns that do not hold only strings are written as text via mixed_columns_to_text,
+    matching what the CSV output contains.
+
+    Args:
+        df (pandas.DataFrame): The DataFrame to write.
+        path (str): Destination file path, without the extension.
+        file_format (str, optional): Either 'parquet' or 'csv'. Defaults to 'parquet'.
+
+    Returns:
+        str: The path of the written file.
+    """
+    if file_format == 'csv':
+        df.to_csv(f'{path}.csv', index=False)
+        return f'{path}.csv'
+    if file_format != 'parquet':
+        raise ValueError(f"Unsupported output format: {file_format}")
+
+    df = mixed_columns_to_text(df)
+    df.to_parquet(f'{path}.parquet', engine='pyarrow', compression='snappy', index=False)
+    return f'{path}.parquet'
+
+def save_affiliation_files(processed_data, affiliations, output_dir='affiliation_layers', file_format='parquet', max_workers=8):
     """
     Save affiliation files based on processed data and affiliations.
 
+    Each file holds the rows with that affiliation, with the affiliation's own column but none of the other
+    'Affiliation: ' columns. The files are independent of each other, so they are written concurrently from a thread pool.
+
     Args:
         processed_data (pandas.DataFrame): The processed data containing the affiliation columns.
         affiliations (list): A list of affiliations to create files for.
-        output_dir (str, optional): The directory to save the affiliation files. Defaults to 'affiliation_files'.
+        output_dir (str, optional): The directory to save the affiliation files. Defaults to 'affiliation_layers'.
+        file_format (str, optional): Either 'parquet' or 'csv'. Defaults to 'parquet'.
+        max_workers (int, optional): The number of files written concurrently. Defaults to 8.
 
     Returns:
         None
+
+    Raises:
+        RuntimeError: If any affiliation file could not be written. The other files are still written first.
     """
     os.makedirs(output_dir, exist_ok=True)
-    for affil in affiliations:
-        column_name = f'Affiliation: {affil}'
-        if column_name in processed_data.columns:
-            sub_df = processed_data[processed_data[column_name]]
-            if not sub_df.empty:
-                filename = f'{affil.replace(" ", "_").replace("/", "-")}-layer.csv'
-                sub_df.to_csv(os.path.join(output_dir, filename), index=False)
-                logging.info(f"Affiliation file for {affil} created.")
-        else:
-            logging.warning(f"Column {column_name} does not exist in the DataFrame.")
-            
+    # Each layer only carries its own affiliation column, so the other affiliation columns are never copied
+    base_columns = [column for column in processed_data.columns if not column.startswith('Affiliation: ')]
+
+    def write_layer(affil, column_name):
+        # Slice inside the worker so at most max_workers layer copies are alive at once
+        sub_df = processed_data.loc[processed_data[column_name], base_columns + [column_name]]
+        if sub_df.empty:
+            return False
+        filename = f'{affil.replace(" ", "_").replace("/", "-")}-layer'
+        write_table(sub_df, os.path.join(output_dir, filename), file_format)
+        return True
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for affil in affiliations:
+            column_name = f'Affiliation: {affil}'
+            if column_name in processed_data.columns:
+                futures[executor.submit(write_layer, affil, column_name)] = affil
+            else:
+                logging.warning(f"Column {column_name} does not exist in the DataFrame.")
+
+        failed = []
+        for future in as_completed(futures):
+            affil = futures[future]
+            try:
+                if future.result():
+                    logging.info(f"Affiliation file for {affil} created.")
+            except Exception as e:
+                logging.error(f"Writing affiliation file for {affil} failed: {e}")
+                failed.append(affil)
+
+    # Let the remaining files finish, then stop the run so a partial set of layers is not reported as complete
+    if failed:
+        raise RuntimeError(f"Failed to write affiliation files for: {', '.join(sorted(failed))}")
+
 
 def handle_interest_data(main_df, interest_file_path):
     """
@@ -221,19 +385,20 @@ def handle_interest_data(main_df, interest_file_path):
     """
     # Load interest data
     logging.info("Loading interest data.")
-    interest_df = pd.read_csv(interest_file_path)
+    interest_df = pd.read_csv(interest_file_path, engine='pyarrow')
     interest_df.rename(columns={'Constituent LookupID': 'LID'}, inplace=True)
 
     # Create interest dictionary
     logging.info("Creating interest dictionary.")
+    # Single pass over the columns as plain lists; a later row for the same LID and category replaces an earlier one
     interest_dic = {}
-    for index, row in interest_df.iterrows():
-        make_int_dic(row, interest_dic)
+    columns = ['LID', 'Interest Category', 'Interest Subcategory', 'Interest Level']
+    for lid, interest_cat, interest_subc, int_level in zip(*(interest_df[column].tolist() for column in columns)):
+        interest_dic.setdefault(lid, {})[interest_cat] = (interest_subc, int_level)
 
     # Merge interest data
     logging.info("Merging interest data.")
-    main_df['Interests'] = main_df['LID'].apply(
-        lambda id: add_int_data(id, interest_dic))
+    main_df['Interests'] = main_df['LID'].map(interest_dic).fillna('No Known Interests')
 
     # Perform final edits on the merged DataFrame
     logging.info("Applying final edits to merged DataFrame.")
@@ -241,22 +406,6 @@ def handle_interest_data(main_df, interest_file_path):
 
     return main_df
 
-def make_int_dic(row, dic):
-    """Updates dictionary with interest data."""
-    id = row['LID']
-    interest_cat = row['Interest Category']
-    interest_subc = row['Interest Subcategory']
-    int_level = row['Interest Level']
-
-    if id not in dic:
-        dic[id] = {}
-    dic[id][interest_cat] = (interest_subc, int_level)
-
-    return dic
-
-def add_int_data(id, interest_dic):
-    return interest_dic.get(id, 'No Known Interests')
-
 def merged_df_edits(merged_df):
     """
     Perform edits on the merged_df DataFrame.
@@ -271,7 +420,6 @@ def merged_df_edits(merged_df):
         'Date of Last Recognition Transaction': 'Date of Last UM Recognition Transaction',
         'Date of Last Recognition Transaction.1': 'Date of Last ISR Recognition Transaction'
     })
-    merged_df = merged_df.drop_duplicates(subset='LID', keep='first')
     return merged_df
 
 def collect_addresses_to_geocode(df):
@@ -285,41 +433,108 @@ def collect_addresses_to_geocode(df):
         dict: A dictionary where the keys are the indices of the rows in the DataFrame
               and the values are the addresses that need to be geocoded.
     """
-    addresses_to_geocode = {}
-    for index, row in df.iterrows():
-        if pd.isna(row['Latitude']) or pd.isna(row['Longitude']):
-            address = f"{row['Home Address']}, {row['Home City']}, {row['Home State']} {row['Home Zip']}, {row['Home Country']}"
-            if all(pd.notna(row[field]) and row[field].strip() != "" for field in ['Home Address', 'Home City', 'Home State', 'Home Zip', 'Home Country']):
-                addresses_to_geocode[index] = address
-    return addresses_to_geocode
-
-def batch_geocode_addresses(addresses_to_geocode, api_key, df):
+    address_fields = ['Home Address', 'Home City', 'Home State', 'Home Zip', 'Home Country']
+    missing_coords = df['Latitude'].isna() | df['Longitude'].isna()
+    # Every address component must be present and non-blank
+    complete_address = df[address_fields].apply(lambda s: s.notna() & s.astype(str).str.strip().ne('')).all(axis=1)
+    return df.loc[missing_coords & complete_address, 'Primary Address'].to_dict()
+
+def normalize_address(address):
+    """Normalizes an address string (lowercase, collapsed whitespace) for use as a geocode cache key."""
+    return ' '.join(address.lower().split())
+
+def open_geocode_cache(cache_path):
+    """
+    Opens the persistent geocode cache, creating the SQLite table if it does not exist.
+
+    Args:
+        cache_path (str): Path to the SQLite cache file.
+
+    Returns:
+        sqlite3.Connection: An open connection to the cache.
+    """
+    conn = sqlite3.connect(cache_path)
+    conn.execute("CREATE TABLE IF NOT EXISTS geocode_cache (address TEXT PRIMARY KEY, lat REAL, lon REAL)")
+    return conn
+
+def batch_geocode_addresses(addresses_to_geocode, api_key, df, max_workers=16, cache_path=GEOCODE_CACHE_PATH):
     """
     Batch geocodes a list of addresses using the ArcGIS Geocoding service.
 
+    Rows sharing the same (normalized) address are geocoded once. Addresses found in the persistent cache are filled
+    in without a network request. The remaining addresses are geocoded concurrently from a thread pool and written
+    back to the cache on success.
+
     Parameters:
-    - addresses_to_geocode (dict): A dictionary containing addresses to geocode as keys and their corresponding indices as values.
+    - addresses_to_geocode (dict): A dictionary containing the DataFrame indices as keys and the addresses to geocode as values.
     - api_key (str): The API key for accessing the ArcGIS Geocoding service.
     - df (pandas.DataFrame): The DataFrame to update with geocoded latitude and longitude values.
+    - max_workers (int, optional): The number of concurrent geocoding requests. Defaults to 16.
+    - cache_path (str, optional): Path to the SQLite geocode cache. Defaults to 'geocode_cache.sqlite' next to this script.
 
     Returns:
     None
     """
-    gis = GIS(api_key=api_key)
-    # Initialize tqdm progress bar
-    progress_bar = tqdm(addresses_to_geocode.items(), total=len(addresses_to_geocode), desc="Geocoding addresses")
-    
-    for index, address in progress_bar:
-        try:
-            result = geocode(address, as_featureset=False)[0]
-            df.at[index, 'Latitude'] = result['location']['y']
-            df.at[index, 'Longitude'] = result['location']['x']
-            # Optionally update the progress description with success message
-            #progress_bar.set_description(f"Geocoded: {address}")
-        except Exception as e:
-            logging.error(f"Geocoding failed for {address}: {e}")
-            # Update progress bar with error info
-            #progress_bar.set_description(f"Failed geocoding: {address}")
+    conn = open_geocode_cache(cache_path)
+
+    # Group rows by normalized address so each distinct address is looked up only once
+    rows_by_address = defaultdict(list)
+    for index, address in addresses_to_geocode.items():
+        rows_by_address[normalize_address(address)].append(index)
+    unique_addresses = list(rows_by_address)
+    logging.info(f"Geocoding {len(unique_addresses)} unique addresses for {len(addresses_to_geocode)} rows")
+
+    # Collect results by position and write them to the DataFrame in one assignment at the end
+    latitudes = np.full(len(unique_addresses), np.nan, dtype='float32')
+    longitudes = np.full(len(unique_addresses), np.nan, dtype='float32')
+
+    # Fill cached addresses first and only geocode the misses
+    pending = {}
+    for position, address in enumerate(unique_addresses):
+        cached = conn.execute("SELECT lat, lon FROM geocode_cache WHERE address = ?", (address,)).fetchone()
+        if cached is not None:
+            latitudes[position], longitudes[position] = cached
+        else:
+            pending[position] = address
+    logging.info(f"Geocode cache hits: {len(unique_addresses) - len(pending)}, misses: {len(pending)}")
+
+    try:
+        # Only connect to ArcGIS when something actually needs geocoding
+        if pending:
+            gis = GIS(api_key=api_key)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(geocode, address, as_featureset=False): (position, address)
+                           for position, address in pending.items()}
+                # Initialize tqdm progress bar
+                progress_bar = tqdm(as_completed(futures), total=len(futures), desc="Geocoding addresses")
+
+                for future in progress_bar:
+                    position, address = futures[future]
+                    try:
+                        result = future.result()[0]
+                        latitudes[position] = result['location']['y']
+                        longitudes[position] = result['location']['x']
+                        conn.execute("INSERT OR REPLACE INTO geocode_cache (address, lat, lon) VALUES (?, ?, ?)",
+                                     (address, result['location']['y'], result['location']['x']))
+                        # Optionally update the progress description with success message
+                        #progress_bar.set_description(f"Geocoded: {address}")
+                    except Exception as e:
+                        logging.error(f"Geocoding failed for {address}: {e}")
+                        # Update progress bar with error info
+                        #progress_bar.set_description(f"Failed geocoding: {address}")
+    finally:
+        # Commit whatever was geocoded so an interrupted run still benefits from the cache
+        conn.commit()
+        conn.close()
+
+    # Broadcast each address's result to all of its rows
+    positions = np.array([position for position, address in enumerate(unique_addresses) for _ in rows_by_address[address]], dtype=int)
+    indices = np.array([index for address in unique_addresses for index in rows_by_address[address]])
+
+    # Only overwrite rows that were geocoded, so a failed lookup keeps any coordinate the row already had
+    found = ~np.isnan(latitudes[positions])
+    df.loc[indices[found], 'Latitude'] = latitudes[positions][found]
+    df.loc[indices[found], 'Longitude'] = longitudes[positions][found]
 
 def main():
 
@@ -331,7 +546,7 @@ def main():
     # If you are starting from scratch, set this to None.
     # Note: You can just remove the # sign to uncomment the line below and then add # to comment out the other line
     #========================================================================================================
-    # The last completed csv from running this script
+    # The last completed csv (or new_main_dataset.parquet) from running this script
     geocoded_data_path = '3-18-dataset_copy.csv'
     # geocoded_data_path = None
 
@@ -339,16 +554,21 @@ def main():
     file_path = '9.0 MProfile - donors and affiliates Feb. 2024.xlsx' 
     interest_file_path = 'DART Interest Data 2024 - Known interests for ISR Constituents copy.csv'
 
+    # Output files are written as Parquet. Set this to True to also write CSV copies for tools that cannot read Parquet.
+    write_csv = False
+    output_formats = ['parquet', 'csv'] if write_csv else ['parquet']
+
     # Load main and geocoded data
     logging.info("Loading main data from Excel.")           
-    new_data = load_data(file_path)
+    new_data = load_data(file_path, usecols=lambda column: column not in DROPPED_COLUMNS)
     logging.info("Loading geocoded data.")
 
     merged_data = new_data  # Default to new_data in case no geocoded data is merged
 
     if geocoded_data_path != None and os.path.exists(geocoded_data_path):
         logging.info("Loading geocoded data.")
-        geocoded_data = load_data(geocoded_data_path)
+        geocoded_data = load_data(geocoded_data_path,
+                                  usecols=lambda column: column in {'ConstituentSYSTEMID', 'Latitude', 'Longitude', 'latitude', 'longitude'})
 
         # Ensure columns are correctly named for consistency
         if 'latitude' in geocoded_data.columns and 'longitude' in geocoded_data.columns:
@@ -357,6 +577,9 @@ def main():
         # Check if essential columns exist before merging
         if 'Latitude' in geocoded_data.columns and 'Longitude' in geocoded_data.columns:
             logging.info("Merging geocoded data into main DataFrame.")
+            # Older outputs may hold placeholders such as 'Not Available'; treat those as not geocoded
+            for column in ['Latitude', 'Longitude']:
+                geocoded_data[column] = pd.to_numeric(geocoded_data[column], errors='coerce').astype('float32')
             merged_data = pd.merge(new_data, geocoded_data[['ConstituentSYSTEMID', 'Latitude', 'Longitude']], on='ConstituentSYSTEMID', how='left')
         else:
             logging.error("Geocoded data does not contain 'Latitude' or 'Longitude'. Using original data without merge.")
@@ -367,10 +590,16 @@ def main():
     logging.info("Cleaning and preparing data.")
     merged_data = clean_and_prepare_data(merged_data) 
 
+    # Keep one row per constituent before any further processing so later steps work on fewer rows
+    merged_data = merged_data.drop_duplicates(subset='LID', keep='first')
+
     # Handle affiliations
     logging.info("Handling affiliations.")
     merged_data, all_affiliations = create_affiliation_columns(merged_data)
 
+    # Store repetitive string columns as categoricals for the remaining steps
+    merged_data = categorize_columns(merged_data)
+
     # Collect addresses that need geocoding
     addresses_to_geocode = collect_addresses_to_geocode(merged_data)
     
@@ -389,7 +618,8 @@ def main():
 
     # Save processed data
     logging.info("Saving processed data to file.")
-    processed_data.to_csv('new_main_dataset.csv', index=False)
+    for file_format in output_formats:
+        write_table(processed_data, 'new_main_dataset', file_format)
 
     # Extract unique affiliations from processed_data for file creation
     affiliations = processed_data.columns[processed_data.columns.str.startswith('Affiliation: ')]
@@ -397,7 +627,8 @@ def main():
     affiliations = [affil.replace('Affiliation: ', '') for affil in affiliations]
     
     # Create and save affiliation files
-    save_affiliation_files(processed_data, affiliations)
+    for file_format in output_formats:
+        save_affiliation_files(processed_data, affiliations, file_format=file_format)
 
     logging.info("Processing complete.")
     